@@ -1,26 +1,55 @@
 from __future__ import annotations
+import functools
+import json
+import logging
 import os
 import re
+import time
+from concurrent.futures import ThreadPoolExecutor
 from html import escape
-import traceback
-from typing import Optional, Dict, Any
+from logging.handlers import RotatingFileHandler
+from typing import Optional, Dict, Any, Callable
 
 import requests  # uses Anki's bundled venv
+from requests.adapters import HTTPAdapter
 
+try:
+    import orjson  # ships with Anki (>= 23.10) as a dependency of the anki package; json is only a fallback
+except ImportError:
+    orjson = None
+
+from anki.utils import ids2str, split_fields
 from aqt import mw, gui_hooks
+from aqt.operations.note import update_notes
 from aqt.qt import QAction, QInputDialog, QKeySequence, QShortcut, QWidget
 from aqt.utils import showInfo, showWarning, tooltip
 
+from . import _cache
+
 AddonConfig = Dict[str, Any]
 
+logger = logging.getLogger(__name__)
+
 
 # ==============================
 # Config helper
 # ==============================
 
+# getConfig() reads and parses meta.json on every call, so keep the parsed config
+# in memory until the settings are changed (see _invalidate_config_cache).
+_CFG_CACHE: Optional[AddonConfig] = None
+
+
 def _get_config() -> AddonConfig:
-    cfg = mw.addonManager.getConfig(__name__)
-    return cfg or {}
+    global _CFG_CACHE
+    if _CFG_CACHE is None:
+        _CFG_CACHE = mw.addonManager.getConfig(__name__) or {}
+    return _CFG_CACHE
+
+
+def _invalidate_config_cache(*_args) -> None:
+    global _CFG_CACHE
+    _CFG_CACHE = None
 
 
 # Helpers to fetch numbered keys
@@ -32,6 +61,19 @@ def cfg_get(cfg: dict, key: str, default=None):
 # Prompt building
 # ==============================
 
+_RE_PLACEHOLDER = re.compile(r"\{\{([^}]+)\}\}")
+
+
+@functools.lru_cache(maxsize=16)
+def _compile_template(tpl: str) -> tuple[str, ...]:
+    """
+    Split a prompt template into alternating literal chunks and placeholder names:
+    (literal, name, literal, name, ..., literal). Cached because the same template
+    is used for every note in a batch run.
+    """
+    return tuple(_RE_PLACEHOLDER.split(tpl))
+
+
 def _build_prompts(fields_text: str, fields_map: dict[str, str], cfg: AddonConfig) -> tuple[str, str]:
     """
     Build system and user prompts with the new simplified approach.
@@ -56,19 +98,15 @@ def _build_prompts(fields_text: str, fields_map: dict[str, str], cfg: AddonConfi
             "Provide an explanation that helps understand the concept."
         )
     
-    # Substitute {{fields}} placeholder with actual field content
-    user_prompt = user_prompt_template.replace("{{fields}}", fields_text)
-    
-    # Substitute individual {{FieldName}} placeholders with their values
-    # Use regex to find all {{...}} patterns
-    placeholder_pattern = re.compile(r'\{\{([^}]+)\}\}')
-    
-    def replace_placeholder(match):
-        field_name = match.group(1)
-        # Return the field value if it exists, otherwise empty string
-        return fields_map.get(field_name, "")
-    
-    user_prompt = placeholder_pattern.sub(replace_placeholder, user_prompt)
+    # Substitute {{fields}} and individual {{FieldName}} placeholders in a single pass
+    # over the template (unknown field names are replaced with an empty string).
+    # Inserted field contents are not rescanned, so e.g. cloze markup survives.
+    sub_map = {**fields_map, "fields": fields_text}
+    parts = list(_compile_template(user_prompt_template))
+    get = sub_map.get  # local binding: avoids an attribute lookup per placeholder
+    for i in range(1, len(parts), 2):
+        parts[i] = get(parts[i], "")
+    user_prompt = "".join(parts)
     
     return system_prompt, user_prompt
 
@@ -77,10 +115,43 @@ def _build_prompts(fields_text: str, fields_map: dict[str, str], cfg: AddonConfi
 # API calls (OpenAI / Gemini)
 # ==============================
 
-def _call_openai(api_key: str, model: str, system_prompt: str, user_prompt: str) -> str:
-    url = "https://api.openai.com/v1/chat/completions"
-    headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
-    body = {
+# Shared session so batch runs reuse keep-alive connections (no TLS handshake per note)
+_POOL_MAXSIZE = 16
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=_POOL_MAXSIZE))
+
+_OPENAI_BASE = "https://api.openai.com/v1"
+
+# Batch API: 50% cheaper but asynchronous (up to 24h), so only used for larger batch runs.
+# Jobs are submitted, recorded in the profile folder and collected later; nothing waits on them.
+_BATCH_API_MIN_JOBS = 20
+_BATCH_DONE_STATUSES = ("completed", "failed", "expired", "cancelled")
+_BATCH_CHECK_INTERVAL_MS = 5 * 60 * 1000
+_BATCH_RETRIES = 4
+_PENDING_BATCHES_FILE = "ai_explainer_batches.json"
+
+_MAX_RESPONSE_BYTES = 64 * 1024
+
+
+class ResponseTooLarge(Exception):
+    """The streamed response exceeded 05_max_response_bytes and was discarded."""
+
+
+def _json_dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+
+def _json_loads(data: bytes) -> Any:
+    # Parse raw response bytes directly (skips requests' charset detection in r.json())
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _openai_body(model: str, system_prompt: str, user_prompt: str) -> dict:
+    return {
         "model": model,
         "messages": [
             {"role": "system", "content": system_prompt},
@@ -91,18 +162,170 @@ def _call_openai(api_key: str, model: str, system_prompt: str, user_prompt: str)
         # Users can now control response length via their custom prompt instead
         # of having a hard-coded 512-token limit.
     }
-    r = requests.post(url, headers=headers, json=body, timeout=40)
+
+
+def _gemini_body(system_prompt: str, user_prompt: str) -> dict:
+    return {"contents": [{"parts": [{"text": system_prompt + "\n\n" + user_prompt}]}]}
+
+
+def _call_openai(api_key: str, body_bytes: bytes, max_bytes: int = _MAX_RESPONSE_BYTES) -> str:
+    """
+    body_bytes must request a streamed response ("stream": true).
+    Reading stops once the output exceeds max_bytes, so a runaway answer
+    (no max_tokens is set) cannot block the worker until the timeout.
+    The partial output is discarded and ResponseTooLarge is raised, so cut-off
+    HTML is never written to a note or cached. The same applies when the stream
+    ends without "[DONE]" (dropped connection).
+    """
+    url = f"{_OPENAI_BASE}/chat/completions"
+    headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
+    buf = bytearray()
+    done = False
+    with _SESSION.post(url, headers=headers, data=body_bytes, timeout=40, stream=True) as r:
+        r.raise_for_status()
+        for line in r.iter_lines():
+            # Server-sent events: "data: {...}" ... "data: [DONE]"
+            if not line.startswith(b"data: "):
+                continue
+            data = line[6:]
+            if data == b"[DONE]":
+                done = True
+                break
+            choices = _json_loads(data).get("choices") or []
+            content = (choices[0].get("delta") or {}).get("content") if choices else None
+            if content:
+                buf += content.encode("utf-8")
+                if len(buf) > max_bytes:
+                    raise ResponseTooLarge(
+                        f"Response exceeded 05_max_response_bytes ({max_bytes} bytes)."
+                    )
+    if not done:
+        raise requests.exceptions.ConnectionError("Stream ended before the response was complete.")
+    return buf.decode("utf-8").strip()
+
+
+def _openai_batch_request(method: str, url: str, **kwargs) -> requests.Response:
+    """
+    Batch API request that retries network errors, 429 and 5xx with backoff.
+    Only used for idempotent calls (status checks, downloads, file upload).
+    """
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            r = _SESSION.request(method, url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt >= _BATCH_RETRIES:
+                raise
+        else:
+            transient = r.status_code == 429 or r.status_code >= 500
+            if not transient or attempt >= _BATCH_RETRIES:
+                r.raise_for_status()
+                return r
+        time.sleep(2 ** attempt)
+
+
+def _submit_openai_batch(api_key: str, model: str, prompts: list[tuple[str, str]]) -> str:
+    """
+    Upload one JSONL file of chat completions and create a batch job for it.
+    custom_id of each request is its index in prompts. Returns the batch id.
+    """
+    auth = {"Authorization": f"Bearer {api_key}"}
+    jsonl = b"\n".join(
+        _json_dumps({
+            "custom_id": str(i),
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": _openai_body(model, system_prompt, user_prompt),
+        })
+        for i, (system_prompt, user_prompt) in enumerate(prompts)
+    )
+
+    r = _openai_batch_request(
+        "POST",
+        f"{_OPENAI_BASE}/files",
+        headers=auth,
+        data={"purpose": "batch"},
+        files={"file": ("ai_explainer_batch.jsonl", jsonl, "application/jsonl")},
+        timeout=120,
+    )
+    file_id = _json_loads(r.content)["id"]
+
+    # batch 作成はリトライしない（応答だけ失われた場合に二重課金になるため）
+    r = _SESSION.post(
+        f"{_OPENAI_BASE}/batches",
+        headers=auth,
+        json={"input_file_id": file_id, "endpoint": "/v1/chat/completions", "completion_window": "24h"},
+        timeout=40,
+    )
     r.raise_for_status()
-    return r.json()["choices"][0]["message"]["content"].strip()
+    return _json_loads(r.content)["id"]
 
 
-def _call_gemini(api_key: str, model: str, system_prompt: str, user_prompt: str) -> str:
+def _parse_batch_result_line(line: bytes) -> tuple[str, tuple[Optional[str], Optional[str]]]:
+    """Parse one line of a batch output/error file into (custom_id, (content, error))."""
+    item = _json_loads(line)
+    custom_id = str(item["custom_id"])
+    resp = item.get("response") or {}
+    body = resp.get("body") or {}
+    if resp.get("status_code") == 200:
+        try:
+            content = body["choices"][0]["message"]["content"]
+        except (KeyError, IndexError, TypeError):
+            content = None
+        if content and content.strip():
+            return custom_id, (content.strip(), None)
+        return custom_id, (None, "Empty response from model.")
+    err = body.get("error") or item.get("error") or {}
+    msg = err.get("message") if isinstance(err, dict) else err
+    return custom_id, (None, f"API error: {msg or resp.get('status_code') or 'unknown error'}")
+
+
+def _fetch_openai_batch(
+    api_key: str, batch_id: str
+) -> Optional[tuple[dict[str, tuple[Optional[str], Optional[str]]], str]]:
+    """
+    Check a batch job once. Returns None while it is still running. Otherwise returns
+    ({custom_id: (content, error)}, fallback error for requests without any result line).
+    """
+    auth = {"Authorization": f"Bearer {api_key}"}
+    r = _openai_batch_request("GET", f"{_OPENAI_BASE}/batches/{batch_id}", headers=auth, timeout=40)
+    batch = _json_loads(r.content)
+    status = batch.get("status")
+    if status not in _BATCH_DONE_STATUSES:
+        return None
+
+    fallback = f"No result returned (batch {status})."
+    errors = (batch.get("errors") or {}).get("data") or []
+    if errors and errors[0].get("message"):
+        fallback = f"Batch {status}: {errors[0]['message']}"
+
+    # expired/cancelled バッチでも完了分は output_file_id に、失敗分は error_file_id に入っている
+    results: dict[str, tuple[Optional[str], Optional[str]]] = {}
+    for file_key in ("output_file_id", "error_file_id"):
+        file_id = batch.get(file_key)
+        if not file_id:
+            continue
+        r = _openai_batch_request("GET", f"{_OPENAI_BASE}/files/{file_id}/content", headers=auth, timeout=120)
+        for line in r.content.splitlines():
+            if not line.strip():
+                continue
+            try:
+                custom_id, out = _parse_batch_result_line(line)
+            except Exception as e:
+                # 1行壊れていても他の結果は使う
+                logger.warning("Unreadable batch result line (batch %s): %s", batch_id, e)
+                continue
+            results[custom_id] = out
+    return results, fallback
+
+
+def _call_gemini(api_key: str, model: str, body_bytes: bytes) -> str:
     url = f"https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent"
     headers = {"Content-Type": "application/json", "x-goog-api-key": api_key}
-    body = {"contents": [{"parts": [{"text": system_prompt + "\n\n" + user_prompt}]}]}
-    r = requests.post(url, headers=headers, json=body, timeout=40)
+    r = _SESSION.post(url, headers=headers, data=body_bytes, timeout=40)
     r.raise_for_status()
-    data = r.json()
+    data = _json_loads(r.content)
     parts = data["candidates"][0]["content"]["parts"]
     return parts[0]["text"].strip()
 
@@ -111,13 +334,14 @@ def _call_gemini(api_key: str, model: str, system_prompt: str, user_prompt: str)
 # Generate explanation for 1 note
 # ==============================
 
-def _generate_for_note(note) -> tuple[Optional[str], Optional[str]]:
+def _generate_for_note(note, cfg: Optional[AddonConfig] = None) -> tuple[Optional[str], Optional[str]]:
     # 互換のため残しておくが、今後は main-thread 専用として使う想定
-    cfg = _get_config()
+    if cfg is None:
+        cfg = _get_config()
     job, err = _prepare_note_job_from_note(note, cfg)
     if err:
         return None, err
-    html, err2 = _generate_html(job["fields_text"], job["fields_map"], cfg)
+    html, err2 = _generate_html(job, cfg)
     if err2:
         return None, err2
     ok, err3 = _apply_html_to_note(job["nid"], job["e_field"], html, job["behavior"], job["sep"])
@@ -125,16 +349,43 @@ def _generate_for_note(note) -> tuple[Optional[str], Optional[str]]:
 
 
 def _prepare_note_job_from_note(note, cfg: AddonConfig) -> tuple[Optional[dict], Optional[str]]:
+    return _prepare_note_job(int(note.id), dict(note.items()), cfg)
+
+
+def _read_note_fields(nids: list[int]) -> dict[int, dict[str, str]]:
+    """
+    Read the fields of many notes with a single query instead of one get_note() per note.
+    Returns {nid: {field name: value}}.
+    """
+    names_by_mid: dict[int, list[str]] = {}
+    out: dict[int, dict[str, str]] = {}
+    rows = mw.col.db.all(f"select id, mid, flds from notes where id in {ids2str(nids)}")
+    for nid, mid, flds in rows:
+        names = names_by_mid.get(mid)
+        if names is None:
+            model = mw.col.models.get(mid)
+            flds_meta = sorted(model["flds"], key=lambda f: f["ord"]) if model else []
+            names = [f["name"] for f in flds_meta]
+            names_by_mid[mid] = names
+        out[nid] = dict(zip(names, split_fields(flds)))
+    return out
+
+
+def _prepare_note_job(nid: int, note_fields: dict[str, str], cfg: AddonConfig) -> tuple[Optional[dict], Optional[str]]:
     """
     Prepare job data from a note using the new multi-field approach.
     Reads fields specified in 02_input_fields and concatenates them in "FieldName:\nvalue" format.
     Also creates a fields_map for individual field placeholder replacement.
+    Prompts and the serialized request body are built here (main thread), so the
+    background worker only has to send them.
     """
     input_fields = cfg_get(cfg, "02_input_fields", ["Front", "Back"])
     if not isinstance(input_fields, list) or not input_fields:
         input_fields = ["Front", "Back"]
     
     e_field = cfg_get(cfg, "02_explanation_field", "Explanation")
+    behavior = cfg_get(cfg, "04_on_existing_behavior", "skip")
+    sep = cfg_get(cfg, "04_append_separator", "\n<hr>\n")
 
     # Read all input fields and concatenate
     field_parts = []
@@ -142,7 +393,7 @@ def _prepare_note_job_from_note(note, cfg: AddonConfig) -> tuple[Optional[dict],
     
     for field_name in input_fields:
         try:
-            field_value = (note[field_name] or "").strip()
+            field_value = (note_fields[field_name] or "").strip()
             # Add to fields_map even if empty (for consistent placeholder behavior)
             fields_map[field_name] = field_value
             
@@ -150,7 +401,7 @@ def _prepare_note_job_from_note(note, cfg: AddonConfig) -> tuple[Optional[dict],
                 # Note: Field values are passed as-is to the LLM without sanitization.
                 # This preserves HTML tags, formatting, and special characters that
                 # may be important context for generating explanations.
-                field_parts.append(f"{field_name}:\n{field_value}")
+                field_parts.extend((field_name, ":\n", field_value, "\n\n"))
         except KeyError:
             # Field doesn't exist in this note type, don't add to map
             pass
@@ -159,59 +410,72 @@ def _prepare_note_job_from_note(note, cfg: AddonConfig) -> tuple[Optional[dict],
     if not field_parts:
         return None, "All input fields are empty or missing."
     
-    # Concatenate with double newline separator
-    fields_text = "\n\n".join(field_parts)
+    # Pieces are already separated by a double newline; drop the trailing one and
+    # join once (no per-field intermediate strings)
+    field_parts.pop()
+    fields_text = "".join(field_parts)
     
     # Check explanation field
     try:
-        existing_raw = note[e_field] or ""
+        existing_raw = note_fields[e_field] or ""
     except KeyError:
         return None, "Explanation field does not exist."
     
-    behavior = cfg_get(cfg, "04_on_existing_behavior", "skip")
     if existing_raw.strip() and behavior == "skip":
         return None, "Explanation already exists."
     
-    sep = cfg_get(cfg, "04_append_separator", "\n<hr>\n")
+    system_prompt, user_prompt = _build_prompts(fields_text, fields_map, cfg)
+    provider, api_key, model = _resolve_provider(cfg)
+    if provider == "openai":
+        body = _json_dumps({**_openai_body(model, system_prompt, user_prompt), "stream": True})
+    else:
+        body = _json_dumps(_gemini_body(system_prompt, user_prompt))
     
     return {
-        "nid": int(note.id),
+        "nid": nid,
         "e_field": e_field,
-        "fields_text": fields_text,
-        "fields_map": fields_map,
+        "provider": provider,
+        "api_key": api_key,
+        "model": model,
+        "system_prompt": system_prompt,
+        "user_prompt": user_prompt,
+        "body": body,
         "behavior": behavior,
         "sep": sep,
     }, None
 
-_RE_WHOLE_FENCE = re.compile(
-    r"^\s*```(?:\s*(?P<lang>[a-zA-Z0-9_-]+))?\s*\n(?P<body>.*)\n```\s*$",
-    re.DOTALL,
-)
-
 def _strip_markdown_fences(s: str) -> str:
     if not s:
         return ""
     t = s.strip()
 
+    # 大半の応答はフェンス無しなので、先頭だけ確認してすぐ返す
+    if not t.startswith("```"):
+        return t
+
     # 「全文が1つの ```...``` で包まれている」場合だけ剥がす
-    m = _RE_WHOLE_FENCE.match(t)
-    if m:
-        body = (m.group("body") or "").strip()
-        lang = (m.group("lang") or "").lower()
+    # 構造が決まっているので正規表現は使わず、1行目と末尾だけで判定する
+    #   ```lang\n<body>\n```
+    first_nl = t.find("\n")
+    body_end = len(t) - 4  # 末尾の "\n```" の位置
+    if first_nl < 0 or not t.endswith("\n```") or body_end < first_nl + 1:
+        # それ以外は何もしない（消しすぎ防止）
+        return t
 
-        # 任意：HTMLっぽくない言語のときは剥がさない（保守的）
-        # 例: json / python が来たらそのまま返す
-        if lang and lang not in ("html", "htm", "xml"):
-            return t
+    lang = t[3:first_nl].strip().lower()
+    if not all(c.isascii() and (c.isalnum() or c in "_-") for c in lang):
+        return t
 
-        return body
+    # 任意：HTMLっぽくない言語のときは剥がさない（保守的）
+    # 例: json / python が来たらそのまま返す
+    if lang and lang not in ("html", "htm", "xml"):
+        return t
 
-    # それ以外は何もしない（消しすぎ防止）
-    return t
+    return t[first_nl + 1:body_end].strip()
 
 
-def _generate_html(fields_text: str, fields_map: dict[str, str], cfg: AddonConfig) -> tuple[Optional[str], Optional[str]]:
-    system_prompt, user_prompt = _build_prompts(fields_text, fields_map, cfg)
+def _resolve_provider(cfg: AddonConfig) -> tuple[str, Optional[str], str]:
+    """Return (provider, api_key, model) from config / environment."""
     provider = cfg_get(cfg, "01_provider", "openai")
     if provider == "openai":
         api_key = cfg_get(cfg, "01_openai_api_key") or os.getenv("OPENAI_API_KEY")
@@ -219,17 +483,35 @@ def _generate_html(fields_text: str, fields_map: dict[str, str], cfg: AddonConfi
     else:
         api_key = cfg_get(cfg, "01_gemini_api_key") or os.getenv("GEMINI_API_KEY")
         model = cfg_get(cfg, "01_gemini_model", "gemini-2.5-flash-lite")
+    return provider, api_key, model
+
+
+def _generate_html(job: dict, cfg: AddonConfig) -> tuple[Optional[str], Optional[str]]:
+    system_prompt, user_prompt = job["system_prompt"], job["user_prompt"]
+    provider, api_key, model = job["provider"], job["api_key"], job["model"]
 
     if not api_key:
         return None, "API key not set."
 
+    use_cache = bool(cfg_get(cfg, "05_cache_enabled", False))
+    if use_cache:
+        cache_key = _cache.make_key(provider, model, system_prompt, user_prompt)
+        cached = _cache.get(cache_key, int(cfg_get(cfg, "05_cache_ttl_days", 30) or 0))
+        if cached is not None:
+            logger.debug("Cache hit (note %s)", job["nid"])
+            return cached, None
+
     try:
         if provider == "openai":
-            raw = _call_openai(api_key, model, system_prompt, user_prompt)
+            max_bytes = int(cfg_get(cfg, "05_max_response_bytes", _MAX_RESPONSE_BYTES) or _MAX_RESPONSE_BYTES)
+            raw = _call_openai(api_key, job["body"], max_bytes)
         else:
-            raw = _call_gemini(api_key, model, system_prompt, user_prompt)
+            raw = _call_gemini(api_key, model, job["body"])
 
         html_out = _strip_markdown_fences(raw)
+        if not html_out:
+            # 拒否応答などで本文が空（Skipped: None にならないようエラー扱い）
+            return None, "Empty response from model."
 
         # 任意：最低限の安全チェック（事故防止）
         if html_out and not html_out.lstrip().startswith("<"):
@@ -237,27 +519,273 @@ def _generate_html(fields_text: str, fields_map: dict[str, str], cfg: AddonConfi
             # とりあえずそのまま通すならコメントアウトでOK
             pass
 
+        if use_cache:
+            _cache.put(cache_key, html_out)
         return html_out, None
 
+    except ResponseTooLarge as e:
+        logger.warning("Discarded oversized response (note %s): %s", job["nid"], e)
+        return None, str(e)
+
     except Exception as e:
-        traceback.print_exc()
+        # 429 などが連続しても重くならないよう、トレースバックは debug 時のみ
+        logger.warning("API error (note %s): %s", job["nid"], e, exc_info=logger.isEnabledFor(logging.DEBUG))
         return None, f"API error: {e}"
 
 
-def _apply_html_to_note(nid: int, e_field: str, html: str, behavior: str, sep: str) -> tuple[bool, Optional[str]]:
-    # ★ note/col 操作はメインスレッド側で行う前提
-    note2 = mw.col.get_note(nid)
-    existing_raw = note2[e_field] or ""
+def _use_openai_batch_api(jobs: list[dict], cfg: AddonConfig) -> bool:
+    return (
+        bool(cfg_get(cfg, "05_use_batch_api", False))
+        and len(jobs) >= _BATCH_API_MIN_JOBS
+        and jobs[0]["provider"] == "openai"
+    )
+
+
+# ==============================
+# Pending OpenAI batch jobs
+# ==============================
+
+def _pending_batches_path() -> str:
+    return os.path.join(mw.pm.profileFolder(), _PENDING_BATCHES_FILE)
+
+
+def _load_pending_batches() -> list[dict]:
+    try:
+        with open(_pending_batches_path(), encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return []
+    except (OSError, ValueError):
+        logger.exception("Failed to read pending batch jobs")
+        return []
+    return data if isinstance(data, list) else []
+
+
+def _save_pending_batches(batches: list[dict]) -> None:
+    # ★ メインスレッドからのみ呼ぶ
+    path = _pending_batches_path()
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(batches, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def _pending_batch_nids() -> set[int]:
+    # 記録済みの batch job で結果待ちのノート（再投稿して二重に課金・追記しないため）
+    return {
+        job["nid"]
+        for rec in _load_pending_batches()
+        for item in (rec.get("items") or {}).values()
+        for job in item.get("jobs") or []
+    }
+
+
+def _submit_batch_run(
+    groups: dict[tuple[str, str], list[dict]],
+    cfg: AddonConfig,
+    total: int,
+    pre_skipped: int,
+    extra: str = "",
+) -> None:
+    """
+    Batch-run counterpart of the thread pool path using the OpenAI Batch API.
+    Cache hits are applied right away; the rest is submitted as one batch job whose id and
+    note mapping are saved to the profile folder. Results are collected later by
+    _check_pending_batches (timer / Tools menu), so Anki is never blocked while OpenAI works.
+    """
+    first = next(iter(groups.values()))[0]
+    api_key, model = first["api_key"], first["model"]
+    if not api_key:
+        results = [(job, None, "API key not set.") for group in groups.values() for job in group]
+        _save_batch_results(results, total, pre_skipped, extra=extra)
+        return
+
+    use_cache = bool(cfg_get(cfg, "05_cache_enabled", False))
+    ttl_days = int(cfg_get(cfg, "05_cache_ttl_days", 30) or 0)
+
+    def worker():
+        cached_results = []
+        pending = []  # [(cache_key, jobs sharing one prompt)]
+        for (system_prompt, user_prompt), group in groups.items():
+            cache_key = _cache.make_key("openai", model, system_prompt, user_prompt) if use_cache else None
+            cached = _cache.get(cache_key, ttl_days) if cache_key else None
+            if cached is not None:
+                cached_results.extend((job, cached, None) for job in group)
+            else:
+                pending.append((cache_key, group))
+        if not pending:
+            return cached_results, None
+
+        batch_id = _submit_openai_batch(
+            api_key, model, [(group[0]["system_prompt"], group[0]["user_prompt"]) for _, group in pending]
+        )
+        record = {
+            "batch_id": batch_id,
+            "model": model,
+            "submitted": int(time.time()),
+            "items": {
+                str(i): {
+                    "cache_key": cache_key,
+                    "jobs": [
+                        {"nid": job["nid"], "e_field": job["e_field"], "behavior": job["behavior"], "sep": job["sep"]}
+                        for job in group
+                    ],
+                }
+                for i, (cache_key, group) in enumerate(pending)
+            },
+        }
+        return cached_results, record
+
+    def on_done(fut):
+        try:
+            cached_results, record = fut.result()
+        except Exception as e:
+            showWarning(f"AI Card Explainer: failed to submit OpenAI batch job:\n{e}")
+            logger.exception("Batch submission failed")
+            return
+        finally:
+            mw.progress.finish()
+        summary_extra = extra
+        if record:
+            try:
+                batches = _load_pending_batches()
+                batches.append(record)
+                _save_pending_batches(batches)
+            except OSError as e:
+                logger.exception("Failed to record batch job %s", record["batch_id"])
+                showWarning(
+                    "AI Card Explainer: the OpenAI batch job was submitted but could not be recorded:\n"
+                    f"{e}\n\nBatch id: {record['batch_id']}"
+                )
+                # cache hits are already paid for, so still write them
+                _save_batch_results(cached_results, total, pre_skipped, extra=summary_extra)
+                return
+            n = sum(len(item["jobs"]) for item in record["items"].values())
+            summary_extra += (
+                f"\n\nSent to OpenAI batch job: {n}\n"
+                "Explanations are written automatically when the job finishes "
+                "(or via Tools → AI Card Explainer: fetch finished batch results)."
+            )
+        _save_batch_results(
+            cached_results, total, pre_skipped, extra=summary_extra, title="AI explanation batch submitted."
+        )
+
+    mw.progress.start(label="Submitting OpenAI batch job...", immediate=True)
+    mw.taskman.run_in_background(worker, on_done)
+
+
+_batch_check_running = False
+
+
+def _check_pending_batches(interactive: bool = False) -> None:
+    """
+    Check recorded batch jobs once (background thread) and apply the results of finished ones.
+    Called periodically by a timer, at profile load and from the Tools menu.
+    Failed checks keep the job recorded, so it is simply retried next time.
+    """
+    global _batch_check_running
+    if _batch_check_running:
+        if interactive:
+            tooltip("Already checking OpenAI batch jobs...")
+        return
+    batches = _load_pending_batches()
+    if not batches:
+        if interactive:
+            tooltip("No pending OpenAI batch jobs.")
+        return
+
+    cfg = _get_config()
+    # 投稿後にプロバイダを切り替えていても OpenAI のキーで取りに行く
+    api_key = cfg_get(cfg, "01_openai_api_key") or os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        if interactive:
+            showWarning("OpenAI API key not set.")
+        return
+    use_cache = bool(cfg_get(cfg, "05_cache_enabled", False))
+
+    def worker():
+        finished = []  # [(record, {custom_id: (html, err)})]
+        running = 0
+        for rec in batches:
+            try:
+                fetched = _fetch_openai_batch(api_key, rec["batch_id"])
+            except Exception as e:
+                logger.warning("Checking batch %s failed: %s", rec.get("batch_id"), e,
+                               exc_info=logger.isEnabledFor(logging.DEBUG))
+                running += 1
+                continue
+            if fetched is None:
+                running += 1
+                continue
+            results, fallback = fetched
+            outs = {}
+            for custom_id, item in rec["items"].items():
+                raw, err = results.get(custom_id, (None, fallback))
+                html_out = _strip_markdown_fences(raw) if raw else None
+                if use_cache and html_out and item.get("cache_key"):
+                    _cache.put(item["cache_key"], html_out)
+                outs[custom_id] = (html_out, err)
+            finished.append((rec, outs))
+        return finished, running
+
+    def on_done(fut):
+        global _batch_check_running
+        _batch_check_running = False
+        try:
+            finished, running = fut.result()
+        except Exception:
+            logger.exception("Checking pending batch jobs failed")
+            return
+        if not finished:
+            if interactive:
+                tooltip(f"OpenAI batch jobs still running: {running}")
+            return
+
+        done_ids = {rec["batch_id"] for rec, _outs in finished}
+
+        def forget_finished() -> None:
+            # 結果を保存できてから記録を消す（失敗したら次回のチェックでやり直せる）
+            _save_pending_batches([b for b in _load_pending_batches() if b.get("batch_id") not in done_ids])
+
+        results = []
+        for rec, outs in finished:
+            for custom_id, item in rec["items"].items():
+                html, err = outs[custom_id]
+                results.extend((job, html, err) for job in item["jobs"])
+        extra = f"\n\nOpenAI batch jobs still running: {running}" if running else ""
+        _save_batch_results(
+            results, len(results), 0, extra=extra, title="OpenAI batch job finished.", on_saved=forget_finished
+        )
+
+    _batch_check_running = True
+    mw.taskman.run_in_background(worker, on_done)
+
+
+def _merge_html_into_note(note, e_field: str, html: str, behavior: str, sep: str) -> tuple[bool, Optional[str]]:
+    # note を書き換えるだけで保存はしない（呼び出し側で flush / update_notes）
+    try:
+        existing_raw = note[e_field] or ""
+    except KeyError:
+        # batch 待ちの間にフィールド名やノートタイプが変わった場合など
+        return False, "Explanation field does not exist."
     existing = existing_raw.strip()
     if existing and behavior == "skip":
         return False, "Explanation already exists."
     if existing and behavior == "append":
-        note2[e_field] = existing_raw + (sep or "\n<hr>\n") + html
+        note[e_field] = existing_raw + (sep or "\n<hr>\n") + html
     else:
-        note2[e_field] = html
-    note2.flush()
+        note[e_field] = html
     return True, None
 
+
+def _apply_html_to_note(nid: int, e_field: str, html: str, behavior: str, sep: str) -> tuple[bool, Optional[str]]:
+    # ★ note/col 操作はメインスレッド側で行う前提
+    note2 = mw.col.get_note(nid)
+    ok, err = _merge_html_into_note(note2, e_field, html, behavior, sep)
+    if ok:
+        note2.flush()
+    return ok, err
+
 # ==============================
 # Current card in reviewer
 # ==============================
@@ -277,14 +805,14 @@ def _generate_for_current_card() -> None:
         return
 
     def worker():
-        return _generate_html(job["fields_text"], job["fields_map"], cfg)
+        return _generate_html(job, cfg)
 
     def on_done(fut):
         try:
             result = fut.result()
         except Exception as e:
             showWarning(f"AI Card Explainer failed:\n{e}")
-            traceback.print_exc()
+            logger.exception("Generation failed")
             return
         finally:
             mw.progress.finish()
@@ -317,6 +845,59 @@ def _generate_for_current_card() -> None:
 # Tools menu batch run
 # ==============================
 
+def _save_batch_results(
+    results: list,
+    total: int,
+    pre_skipped: int,
+    extra: str = "",
+    title: str = "AI explanation batch finished.",
+    on_saved: Optional[Callable[[], None]] = None,
+) -> None:
+    """
+    Merge (job, html, err) results into their notes and save them with one
+    update_notes op (background, with progress and Browser/Editor refresh),
+    then show the summary. Main thread only.
+    on_saved runs only after the notes were actually saved.
+    """
+    okc = sk = er = 0
+    updated = []
+    for job, html, err in results:
+        if html:
+            try:
+                note2 = mw.col.get_note(job["nid"])
+            except Exception:
+                # batch 待ちの間にノートが削除された場合など
+                sk += 1
+                continue
+            ok, err2 = _merge_html_into_note(note2, job["e_field"], html, job["behavior"], job["sep"])
+            if ok:
+                updated.append(note2)
+                okc += 1
+            else:
+                sk += 1
+        else:
+            er += 1
+    sk += pre_skipped
+
+    def show_summary(*_args) -> None:
+        if on_saved:
+            on_saved()
+        showInfo(
+            f"{title}\n"
+            f"Notes: {total}\n"
+            f"Generated: {okc}\n"
+            f"Skipped: {sk}\n"
+            f"Errors: {er}"
+            f"{extra}"
+        )
+
+    if not updated:
+        show_summary()
+        return
+    # 1件ずつ flush せず、まとめて1回で保存する
+    update_notes(parent=mw, notes=updated).success(show_summary).run_in_background()
+
+
 def _on_tools_generate_with_search() -> None:
     cfg = _get_config()
     deck_name = mw.col.decks.current()["name"]
@@ -339,22 +920,56 @@ def _on_tools_generate_with_search() -> None:
     max_notes = int(cfg_get(cfg, "05_max_notes_per_run", 50))
     target = nids[:max_notes]
 
-    # ★ 先に main thread で必要情報だけ抜き出す（max_notes が小さい想定なので軽い）
+    # ★ 先に main thread で必要情報だけ抜き出す（1クエリでまとめて読む）
+    note_fields = _read_note_fields(target)
+    waiting = _pending_batch_nids()
     jobs = []
     pre_skipped = 0
+    n_waiting = 0
     for nid in target:
-        note = mw.col.get_note(nid)
-        job, err = _prepare_note_job_from_note(note, cfg)
+        if nid in waiting:
+            # 前回の batch job の結果待ち
+            n_waiting += 1
+            pre_skipped += 1
+            continue
+        fields = note_fields.get(nid)
+        if fields is None:
+            pre_skipped += 1
+            continue
+        job, err = _prepare_note_job(nid, fields, cfg)
         if err:
             pre_skipped += 1
         else:
             jobs.append(job)
 
+    # Notes with identical content (e.g. duplicates) produce identical prompts;
+    # send one request per unique prompt and share the result.
+    groups: dict[tuple[str, str], list[dict]] = {}
+    for job in jobs:
+        groups.setdefault((job["system_prompt"], job["user_prompt"]), []).append(job)
+    unique_jobs = {key: group[0] for key, group in groups.items()}
+    extra = f"\n\nWaiting on an earlier OpenAI batch job: {n_waiting}" if n_waiting else ""
+
+    if _use_openai_batch_api(list(unique_jobs.values()), cfg):
+        _submit_batch_run(groups, cfg, len(target), pre_skipped, extra=extra)
+        return
+
+    # API calls are I/O-bound, so a few threads give near-linear speedup.
+    # The thread count is bounded independently of the batch size and never exceeds
+    # the session's pool size, so every worker keeps its own keep-alive connection.
+    parallel = max(1, int(cfg_get(cfg, "05_parallel_requests", 6) or 1))
+    parallel = min(parallel, _POOL_MAXSIZE, max(1, len(unique_jobs)))
+
     def worker():
-        results = []
-        for job in jobs:
-            html, err = _generate_html(job["fields_text"], job["fields_map"], cfg)
-            results.append((job, html, err))
+        keys = list(unique_jobs)
+        todo = list(unique_jobs.values())
+        with ThreadPoolExecutor(max_workers=parallel) as ex:
+            outs = list(ex.map(lambda job: _generate_html(job, cfg), todo))
+        out_by_key = dict(zip(keys, outs))
+        results = [
+            (job, *out_by_key[(job["system_prompt"], job["user_prompt"])])
+            for job in jobs
+        ]
         return {"results": results, "total": len(target), "pre_skipped": pre_skipped}
 
     def on_done(fut):
@@ -362,28 +977,11 @@ def _on_tools_generate_with_search() -> None:
             st = fut.result()
         except Exception as e:
             showWarning(f"AI Card Explainer batch failed:\n{e}")
-            traceback.print_exc()
+            logger.exception("Batch generation failed")
             return
         finally:
             mw.progress.finish()
-        okc = sk = er = 0
-        for job, html, err in st["results"]:
-            if html:
-                ok, err2 = _apply_html_to_note(job["nid"], job["e_field"], html, job["behavior"], job["sep"])
-                if ok:
-                    okc += 1
-                else:
-                    sk += 1
-            else:
-                er += 1
-        sk += int(st.get("pre_skipped", 0))
-        showInfo(
-            "AI explanation batch finished.\n"
-            f"Notes: {st['total']}\n"
-            f"Generated: {okc}\n"
-            f"Skipped: {sk}\n"
-            f"Errors: {er}"
-        )
+        _save_batch_results(st["results"], st["total"], int(st.get("pre_skipped", 0)), extra=extra)
 
     mw.progress.start(label="Batch generating explanations...", immediate=True)
     mw.taskman.run_in_background(worker, on_done)
@@ -407,6 +1005,10 @@ def _init_menu():
     act.triggered.connect(_on_tools_generate_with_search)
     mw.form.menuTools.addAction(act)
 
+    act2 = QAction("AI Card Explainer: fetch finished batch results", mw)
+    act2.triggered.connect(lambda *_: _check_pending_batches(interactive=True))
+    mw.form.menuTools.addAction(act2)
+
 
 def _init_shortcut():
     cfg = _get_config()
@@ -425,6 +1027,36 @@ def _init_shortcut():
     sc2.activated.connect(_generate_for_current_card)
     mw._ai_card_explainer_sc = sc2
 
+def _init_logging() -> None:
+    """
+    Log to <profile>/ai_explainer.log (rotated, bounded size) instead of stderr.
+    DEBUG level (incl. tracebacks for API errors) only when 05_debug_logging is on.
+    """
+    cfg = _get_config()
+    logger.setLevel(logging.DEBUG if cfg_get(cfg, "05_debug_logging", False) else logging.INFO)
+    path = os.path.abspath(os.path.join(mw.pm.profileFolder(), "ai_explainer.log"))
+    for h in list(logger.handlers):
+        if isinstance(h, RotatingFileHandler):
+            if h.baseFilename == path:
+                return
+            # プロファイル切り替え時は古いファイルを閉じる
+            logger.removeHandler(h)
+            h.close()
+    try:
+        handler = RotatingFileHandler(path, maxBytes=1024 * 1024, backupCount=2, encoding="utf-8", delay=True)
+    except Exception:
+        return
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+    logger.addHandler(handler)
+    logger.propagate = False
+
+
+def _on_config_applied() -> None:
+    _invalidate_config_cache()
+    _init_shortcut()
+    _init_logging()
+
+
 def _open_config_gui(*args, **kwargs) -> None:
     """
     Anki: Tools -> Add-ons -> Config を押したときに呼ばれる。
@@ -436,12 +1068,15 @@ def _open_config_gui(*args, **kwargs) -> None:
         if args and isinstance(args[0], QWidget):
             parent = args[0]
         parent = kwargs.get("parent", parent) or mw
-        open_config_gui(__name__, parent=parent, on_apply=_init_shortcut)
+        open_config_gui(__name__, parent=parent, on_apply=_on_config_applied)
     except Exception as e:
         showWarning(f"Failed to open settings dialog:\n{e}")
-        traceback.print_exc()
+        logger.exception("Failed to open settings dialog")
 
 def _on_profile_loaded():
+    _init_logging()
+    # 前回の起動中に投稿した OpenAI batch があれば結果を回収する
+    _check_pending_batches()
     if getattr(mw, "_ai_card_explainer_inited", False):
         return
     mw._ai_card_explainer_inited = True
@@ -449,11 +1084,19 @@ def _on_profile_loaded():
     _init_menu()
     gui_hooks.reviewer_will_show_context_menu.append(_on_reviewer_context_menu)
     _init_shortcut()
+    mw._ai_card_explainer_batch_timer = mw.progress.timer(
+        _BATCH_CHECK_INTERVAL_MS, _check_pending_batches, True, parent=mw
+    )
     try:
         mw.addonManager.setConfigAction(__name__, _open_config_gui)
     except Exception:
         # 古いAnki等で未対応でも落とさない
         pass
+    try:
+        # 設定が他の経路で書き換えられた場合もキャッシュを捨てる
+        mw.addonManager.setConfigUpdatedAction(__name__, _invalidate_config_cache)
+    except Exception:
+        pass
 
 
 gui_hooks.profile_did_open.append(_on_profile_loaded)
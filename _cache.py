@@ -0,0 +1,98 @@
+# _cache.py
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from aqt import mw
+
+# Exact-match response cache, stored per profile.
+# Identical (provider, model, system prompt, user prompt) requests return the stored HTML
+# instead of calling the API again.
+
+_DB_NAME = "ai_explainer_cache.db"
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_initialized_path: Optional[str] = None
+_purged_path: Optional[str] = None
+
+
+def _db_path() -> str:
+    return os.path.join(mw.pm.profileFolder(), _DB_NAME)
+
+
+def _connect(ttl_days: int = 0) -> sqlite3.Connection:
+    global _initialized_path, _purged_path
+    path = _db_path()
+    conn = sqlite3.connect(path, timeout=10)
+    if _initialized_path != path:
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, response TEXT NOT NULL, ts INTEGER NOT NULL)"
+        )
+        conn.commit()
+        _initialized_path = path
+    if ttl_days > 0 and _purged_path != path:
+        # 期限切れの行は読まれないだけで残るので、プロファイルごとに一度まとめて消す
+        conn.execute("DELETE FROM responses WHERE ts < ?", (int(time.time()) - ttl_days * 86400,))
+        conn.commit()
+        _purged_path = path
+    return conn
+
+
+def _normalize(text: str) -> str:
+    # Whitespace-only differences (trailing spaces, extra blank lines, CRLF) are not
+    # meaningful to the model, so collapse them before hashing.
+    return " ".join(text.split())
+
+
+def make_key(provider: str, model: str, system_prompt: str, user_prompt: str) -> str:
+    raw = f"{provider}|{model}|{_normalize(system_prompt)}|{_normalize(user_prompt)}".encode("utf-8")
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+
+def get(key: str, ttl_days: int = 0) -> Optional[str]:
+    """
+    Return the cached response for key, or None on miss.
+    ttl_days <= 0 means entries never expire.
+    """
+    try:
+        with _lock:
+            conn = _connect(ttl_days)
+            try:
+                row = conn.execute("SELECT response, ts FROM responses WHERE key = ?", (key,)).fetchone()
+            finally:
+                conn.close()
+    except sqlite3.Error as e:
+        # キャッシュが壊れていても生成自体は続行する
+        logger.warning("Response cache read failed: %s", e)
+        return None
+    if not row:
+        return None
+    response, ts = row
+    if ttl_days > 0 and int(ts) < int(time.time()) - ttl_days * 86400:
+        return None
+    return response
+
+
+def put(key: str, response: str) -> None:
+    try:
+        with _lock:
+            conn = _connect()
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, response, ts) VALUES (?, ?, ?)",
+                    (key, response, int(time.time())),
+                )
+                conn.commit()
+            finally:
+                conn.close()
+    except sqlite3.Error as e:
+        logger.warning("Response cache write failed: %s", e)
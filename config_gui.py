@@ -26,6 +26,12 @@ DEFAULT_CONFIG: AddonConfig = {
     "04_append_separator": "\n<hr>\n",
 
     "05_max_notes_per_run": 50,
+    "05_parallel_requests": 6,
+    "05_cache_enabled": False,
+    "05_cache_ttl_days": 30,
+    "05_use_batch_api": False,
+    "05_max_response_bytes": 65536,
+    "05_debug_logging": False,
     "05_review_shortcut": "Ctrl+Shift+L",
 }
 
@@ -200,11 +206,36 @@ class ExplainerConfigDialog(QDialog):
         self.max_notes.setRange(1, 5000)
         form_b.addRow("Max notes per run", self.max_notes)
 
+        self.parallel = QSpinBox()
+        self.parallel.setRange(1, 16)
+        form_b.addRow("Parallel requests (batch)", self.parallel)
+
+        self.cache_enabled = QCheckBox("Reuse responses for identical prompts")
+        form_b.addRow("Response cache", self.cache_enabled)
+
+        self.cache_ttl = QSpinBox()
+        self.cache_ttl.setRange(0, 3650)
+        self.cache_ttl.setSpecialValueText("Never expire")
+        self.cache_ttl.setSuffix(" days")
+        form_b.addRow("Cache lifetime", self.cache_ttl)
+
+        self.use_batch_api = QCheckBox("Use OpenAI Batch API for 20+ notes (50% cheaper, slower)")
+        form_b.addRow("OpenAI batch", self.use_batch_api)
+
+        self.max_response_kb = QSpinBox()
+        self.max_response_kb.setRange(1, 1024)
+        self.max_response_kb.setSuffix(" KB")
+        form_b.addRow("Max response size (OpenAI)", self.max_response_kb)
+
+        self.debug_logging = QCheckBox("Write debug details to ai_explainer.log")
+        form_b.addRow("Debug logging", self.debug_logging)
+
         self.shortcut = QKeySequenceEdit()
         form_b.addRow("Review shortcut", self.shortcut)
 
         # live UI tweaks
         self.on_exists.currentIndexChanged.connect(self._sync_append_enabled)
+        self.cache_enabled.toggled.connect(self._sync_cache_enabled)
 
         # Buttons
         self.buttons = QDialogButtonBox(
@@ -224,6 +255,9 @@ class ExplainerConfigDialog(QDialog):
         is_append = (self.on_exists.currentData() == "append")
         self.append_sep.setEnabled(is_append)
 
+    def _sync_cache_enabled(self) -> None:
+        self.cache_ttl.setEnabled(self.cache_enabled.isChecked())
+
     def _on_add_field(self) -> None:
         text, ok = QInputDialog.getText(self, "Add Field", "Enter field name:")
         if ok and text.strip():
@@ -287,11 +321,18 @@ class ExplainerConfigDialog(QDialog):
         self.append_sep.setPlainText(str(cfg.get("04_append_separator", "\n<hr>\n")))
 
         self.max_notes.setValue(int(cfg.get("05_max_notes_per_run", 50) or 50))
+        self.parallel.setValue(int(cfg.get("05_parallel_requests", 6) or 6))
+        self.cache_enabled.setChecked(bool(cfg.get("05_cache_enabled", False)))
+        self.cache_ttl.setValue(int(cfg.get("05_cache_ttl_days", 30) or 0))
+        self.use_batch_api.setChecked(bool(cfg.get("05_use_batch_api", False)))
+        self.max_response_kb.setValue(int(cfg.get("05_max_response_bytes", 65536) or 65536) // 1024)
+        self.debug_logging.setChecked(bool(cfg.get("05_debug_logging", False)))
 
         seq = QKeySequence(str(cfg.get("05_review_shortcut", "Ctrl+Shift+L") or "Ctrl+Shift+L"))
         self.shortcut.setKeySequence(seq)
 
         self._sync_append_enabled()
+        self._sync_cache_enabled()
 
     def _collect_from_ui(self) -> AddonConfig:
         cfg: AddonConfig = dict(self.cfg)
@@ -320,6 +361,12 @@ class ExplainerConfigDialog(QDialog):
 
 
         cfg["05_max_notes_per_run"] = int(self.max_notes.value())
+        cfg["05_parallel_requests"] = int(self.parallel.value())
+        cfg["05_cache_enabled"] = bool(self.cache_enabled.isChecked())
+        cfg["05_cache_ttl_days"] = int(self.cache_ttl.value())
+        cfg["05_use_batch_api"] = bool(self.use_batch_api.isChecked())
+        cfg["05_max_response_bytes"] = int(self.max_response_kb.value()) * 1024
+        cfg["05_debug_logging"] = bool(self.debug_logging.isChecked())
 
         ks = self.shortcut.keySequence()
         cfg["05_review_shortcut"] = ks.toString() or DEFAULT_CONFIG["05_review_shortcut"]